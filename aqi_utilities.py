@@ -1,22 +1,63 @@
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Optional
+
 import requests
 
+# Reuse the connection to the WAQI API between refreshes
+_AQI_SESSION = requests.Session()
+# Connect and read timeouts, an unreachable host fails fast
+AQI_TIMEOUT = (3, 7)
+
+# Default number of seconds a location's AQI is reused for
+AQI_CACHE_TTL = 600
+AQI_CACHE_SIZE = 8
+# (latitude, longitude) -> (monotonic fetch time, AQI)
+_AQI_CACHE: "OrderedDict[tuple[str, str], tuple[float, int]]" = OrderedDict()
+
+
+# Upper bound (inclusive) of each EPA AQI band
+_AQI_BREAKS = (50, 100, 150, 200, 300, 500)
+_AQI_COLORS = (
+    (0, 128, 0),  # Green
+    (192, 192, 0),  # Yellow
+    (192, 128, 0),  # Orange
+    (192, 0, 0),  # Red
+    (128, 0, 128),  # Purple
+    (128, 0, 0),  # Maroon
+    (0, 0, 0),  # Default to black for invalid AQI values
+)
+_AQI_DESCRIPTIONS = ("Good", "OK", "Poor", "Bad", "Very Bad", "XXX", "XXX")
+
+# US EPA breakpoints as (concentration low, concentration high, AQI low, AQI high)
+PM25_BREAKPOINTS = (
+    (0.0, 12.0, 0, 50),
+    (12.1, 35.4, 51, 100),
+    (35.5, 55.4, 101, 150),
+    (55.5, 150.4, 151, 200),
+    (150.5, 250.4, 201, 300),
+    (250.5, 350.4, 301, 400),
+    (350.5, 500.4, 401, 500),
+)
+PM10_BREAKPOINTS = (
+    (0, 54, 0, 50),
+    (55, 154, 51, 100),
+    (155, 254, 101, 150),
+    (255, 354, 151, 200),
+    (355, 424, 201, 300),
+    (425, 504, 301, 400),
+    (505, 604, 401, 500),
+)
+_PM25_HIGHS = tuple(breakpoint[1] for breakpoint in PM25_BREAKPOINTS)
+_PM10_HIGHS = tuple(breakpoint[1] for breakpoint in PM10_BREAKPOINTS)
+
 
 def aqi_to_color(aqi):
     """Return a color based on AQI value."""
-    if 0 <= aqi <= 50:
-        return (0, 128, 0)  # Green
-    elif 51 <= aqi <= 100:
-        return (192, 192, 0)  # Yellow
-    elif 101 <= aqi <= 150:
-        return (192, 128, 0)  # Orange
-    elif 151 <= aqi <= 200:
-        return (192, 0, 0)  # Red
-    elif 201 <= aqi <= 300:
-        return (128, 0, 128)  # Purple
-    elif 301 <= aqi <= 500:
-        return (128, 0, 0)  # Maroon
-    else:
-        return (0, 0, 0)  # Default to black for invalid AQI values
+    if aqi < 0:
+        return (0, 0, 0)
+    return _AQI_COLORS[bisect_left(_AQI_BREAKS, aqi)]
 
 
 def describe_aqi(aqi: float) -> str:
@@ -28,20 +69,42 @@ def describe_aqi(aqi: float) -> str:
     # Good	Fair	Poor	Very poor	Extremely poor
     if aqi < 0:
         return "???"
-    if 0 < aqi < 50:
-        return "Good"
-    if 51 <= aqi <= 100:
-        return "OK"
-    if 101 <= aqi <= 150:
-        return "Poor"
-    if 151 <= aqi <= 200:
-        return "Bad"
-    if 201 <= aqi <= 300:
-        return "Very Bad"
-    return "XXX" if aqi > 300 else "?"
-
-
-def get_external_AQI(latitude: str, longitude: str, waqi_api_key: str) -> int:
+    return _AQI_DESCRIPTIONS[bisect_left(_AQI_BREAKS, aqi)]
+
+
+def _aqi_from(concentration, breakpoints, highs) -> int:
+    index = bisect_left(highs, concentration)
+    if index == len(breakpoints):
+        # Off the top of the scale
+        return 500
+    c_low, c_high, i_low, i_high = breakpoints[index]
+    return round((i_high - i_low) / (c_high - c_low) * (concentration - c_low) + i_low)
+
+
+def pm_to_aqi(pm25: float, pm10: float) -> int:
+    """Get the US EPA AQI for PM2.5 and PM10 concentrations in ug/m3."""
+    # The EPA truncates PM2.5 to 0.1 ug/m3 and PM10 to 1 ug/m3
+    pm25 = int(pm25 * 10) / 10
+    pm10 = int(pm10)
+    return max(
+        _aqi_from(pm25, PM25_BREAKPOINTS, _PM25_HIGHS),
+        _aqi_from(pm10, PM10_BREAKPOINTS, _PM10_HIGHS),
+    )
+
+
+def get_external_AQI(
+    latitude: str,
+    longitude: str,
+    waqi_api_key: str,
+    session: Optional[requests.Session] = None,
+    cache_ttl: float = AQI_CACHE_TTL,
+) -> int:
+    now = time.monotonic()
+    cached = _AQI_CACHE.get((latitude, longitude))
+    if cached is not None and now - cached[0] < cache_ttl:
+        _AQI_CACHE.move_to_end((latitude, longitude))
+        return cached[1]
+
     # Set the API endpoint and parameters
     url = f"https://api.waqi.info/feed/geo:{latitude};{longitude}/?token={waqi_api_key}"
 
@@ -49,10 +112,15 @@ def get_external_AQI(latitude: str, longitude: str, waqi_api_key: str) -> int:
 
     # Check if the request was successful
     try:
-        response = requests.get(url, timeout=10)
+        response = (session or _AQI_SESSION).get(url, timeout=AQI_TIMEOUT)
         data = response.json()
         if response.status_code == 200:
-            return int(data["data"]["aqi"])
+            external_aqi = int(data["data"]["aqi"])
+            _AQI_CACHE[(latitude, longitude)] = (now, external_aqi)
+            _AQI_CACHE.move_to_end((latitude, longitude))
+            if len(_AQI_CACHE) > AQI_CACHE_SIZE:
+                _AQI_CACHE.popitem(last=False)
+            return external_aqi
         print("Error:", data["data"])
         return -1
     except Exception as e:
@@ -1,16 +1,22 @@
 #!/usr/bin/env python3
 import argparse
+import atexit
 import colorsys
+import functools
+import gzip
+import json
 import logging
 import os
+import sched
 import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from threading import Thread
+from threading import Event, Lock, Thread
 
-import aqi
 import board
 import notecard.notecard as notecard
-import numpy
 import pytz
 import requests
 import SafecastPy
@@ -22,8 +28,7 @@ from bme280 import BME280
 from dotenv import load_dotenv
 from enviroplus import gas
 from fonts.ttf import RobotoMedium as UserFont
-from influxdb_client import InfluxDBClient, Point
-from influxdb_client.client.write_api import SYNCHRONOUS
+from influxdb_client import InfluxDBClient, Point, WriteOptions
 from periphery import Serial
 from PIL import Image, ImageDraw, ImageFilter, ImageFont
 from pms5003 import PMS5003
@@ -31,14 +36,19 @@ from pms5003 import ChecksumMismatchError as pmsChecksumMismatchError
 from pms5003 import ReadTimeoutError as pmsReadTimeoutError
 from pms5003 import SerialTimeoutError as pmsSerialTimeoutError
 from prometheus_client import Gauge, Histogram, start_http_server
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from aqi_utilities import aqi_to_color, describe_aqi, get_external_AQI
+from aqi_utilities import aqi_to_color, describe_aqi, get_external_AQI, pm_to_aqi
 
 load_dotenv()
 
 LATITUDE = os.getenv("LATITUDE", "")
 LONGITUDE = os.getenv("LONGITUDE", "")
 WAQI_API_KEY = os.getenv("WAQI_API_KEY", "")
+WAQI_TIME_BETWEEN_REFRESHES = int(os.getenv("WAQI_TIME_BETWEEN_REFRESHES", "600"))
+SENSOR_TIME_BETWEEN_READINGS = float(os.getenv("SENSOR_TIME_BETWEEN_READINGS", "1"))
+DISPLAY_TIME_BETWEEN_REFRESHES = float(os.getenv("DISPLAY_TIME_BETWEEN_REFRESHES", "5"))
 DEBUG = os.getenv("DEBUG", "false")
 
 try:
@@ -112,197 +122,82 @@ PM10 = Gauge(
     "Particulate Matter of diameter less than 10 microns. Measured in micrograms per cubic metre (ug/m3)",
 )
 AQI = Gauge("AQI", "EPA Air Quality Measurement")
+EXTERNAL_AQI = Gauge("external_aqi", "Air Quality Index nearby as reported by WAQI")
 CPU_TEMPERATURE = Gauge("cpu_temperature", "CPU temperature measured (*C)")
 BATTERY_VOLTAGE = Gauge("battery_voltage", "Voltage of the battery (Volts)")
 BATTERY_PERCENTAGE = Gauge(
     "battery_percentage", "Percentage of the battery remaining (%)"
 )
 
+
+def exponential_buckets(start, factor, count):
+    """Histogram buckets growing geometrically from start by factor."""
+    return tuple(round(start * factor**i) for i in range(count))
+
+
+# Gas sensor resistances are roughly log-distributed, so use geometric buckets
+# to keep resolution at the low end where the sensors spend most of their time
 OXIDISING_HIST = Histogram(
     "oxidising_measurements",
     "Histogram of oxidising measurements",
-    buckets=(
-        0,
-        10000,
-        15000,
-        20000,
-        25000,
-        30000,
-        35000,
-        40000,
-        45000,
-        50000,
-        55000,
-        60000,
-        65000,
-        70000,
-        75000,
-        80000,
-        85000,
-        90000,
-        100000,
-    ),
+    buckets=exponential_buckets(1000, 1.5, 13),  # 1k to 130k Ohms
 )
 REDUCING_HIST = Histogram(
     "reducing_measurements",
     "Histogram of reducing measurements",
-    buckets=(
-        0,
-        100000,
-        200000,
-        300000,
-        400000,
-        500000,
-        600000,
-        700000,
-        800000,
-        900000,
-        1000000,
-        1100000,
-        1200000,
-        1300000,
-        1400000,
-        1500000,
-    ),
+    buckets=exponential_buckets(10000, 1.5, 13),  # 10k to 1.3M Ohms
 )
 NH3_HIST = Histogram(
     "nh3_measurements",
     "Histogram of nh3 measurements",
-    buckets=(
-        0,
-        10000,
-        110000,
-        210000,
-        310000,
-        410000,
-        510000,
-        610000,
-        710000,
-        810000,
-        910000,
-        1010000,
-        1110000,
-        1210000,
-        1310000,
-        1410000,
-        1510000,
-        1610000,
-        1710000,
-        1810000,
-        1910000,
-        2000000,
-    ),
+    buckets=exponential_buckets(10000, 1.5, 14),  # 10k to 1.9M Ohms
 )
 
+# Particulate matter histograms share their buckets, 0-100 ug/m3 in steps of 5
+PM_BUCKETS = tuple(range(0, 101, 5))
+# AQI is already banded by the EPA, so bucket on the band boundaries
+AQI_BUCKETS = (0, 50, 100, 150, 200, 300, 500)
+
 PM1_HIST = Histogram(
     "pm1_measurements",
     "Histogram of Particulate Matter of diameter less than 1 micron measurements",
-    buckets=(
-        0,
-        5,
-        10,
-        15,
-        20,
-        25,
-        30,
-        35,
-        40,
-        45,
-        50,
-        55,
-        60,
-        65,
-        70,
-        75,
-        80,
-        85,
-        90,
-        95,
-        100,
-    ),
+    buckets=PM_BUCKETS,
 )
 PM25_HIST = Histogram(
     "pm25_measurements",
     "Histogram of Particulate Matter of diameter less than 2.5 micron measurements",
-    buckets=(
-        0,
-        5,
-        10,
-        15,
-        20,
-        25,
-        30,
-        35,
-        40,
-        45,
-        50,
-        55,
-        60,
-        65,
-        70,
-        75,
-        80,
-        85,
-        90,
-        95,
-        100,
-    ),
+    buckets=PM_BUCKETS,
 )
 PM10_HIST = Histogram(
     "pm10_measurements",
     "Histogram of Particulate Matter of diameter less than 10 micron measurements",
-    buckets=(
-        0,
-        5,
-        10,
-        15,
-        20,
-        25,
-        30,
-        35,
-        40,
-        45,
-        50,
-        55,
-        60,
-        65,
-        70,
-        75,
-        80,
-        85,
-        90,
-        95,
-        100,
-    ),
+    buckets=PM_BUCKETS,
 )
 AQI_HIST = Histogram(
     "aqi_measurements",
     "Histogram of EPA AQI measurements",
-    buckets=(
-        0,
-        5,
-        10,
-        15,
-        20,
-        25,
-        30,
-        35,
-        40,
-        45,
-        50,
-        55,
-        60,
-        65,
-        70,
-        75,
-        80,
-        85,
-        90,
-        95,
-        100,
-    ),
+    buckets=AQI_BUCKETS,
 )
 
+# Latest readings, published by the main loop once per poll and read by the
+# posting threads
+latest_sensor_data = {}
+latest_sensor_data_lock = Lock()
+latest_sensor_data_ready = Event()
+
+# Latest PMS5003 frame not yet taken by get_particulates
+latest_pms_data = None
+
+# Latest AQI reported by WAQI, -1 until the first successful fetch
+external_aqi = -1
+# Seconds before retrying a failed WAQI fetch
+WAQI_RETRY_DELAY = 5
+
+# Latest value of every gauge, kept alongside the gauges so readers don't
+# have to go through the Prometheus collection machinery. Gauges that were
+# never set (e.g. the battery without a monitor) are left out.
+latest_values = {}
+
 # Setup InfluxDB
 # You can generate an InfluxDB Token from the Tokens Tab in the InfluxDB Cloud UI
 INFLUXDB_URL = os.getenv(
@@ -313,13 +208,49 @@ INFLUXDB_ORG_ID = os.getenv("INFLUXDB_ORG_ID", "")
 INFLUXDB_BUCKET = os.getenv("INFLUXDB_BUCKET", "enviro")
 INFLUXDB_SENSOR_LOCATION = os.getenv("INFLUXDB_SENSOR_LOCATION", "San Francisco")
 INFLUXDB_TIME_BETWEEN_POSTS = int(os.getenv("INFLUXDB_TIME_BETWEEN_POSTS", "5"))
+# Points are buffered and written in batches of INFLUXDB_BATCH_SIZE, or after
+# INFLUXDB_FLUSH_INTERVAL milliseconds, whichever comes first
+INFLUXDB_BATCH_SIZE = int(os.getenv("INFLUXDB_BATCH_SIZE", "100"))
+INFLUXDB_FLUSH_INTERVAL = int(os.getenv("INFLUXDB_FLUSH_INTERVAL", "60000"))
 influxdb_client = InfluxDBClient(
-    url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG_ID
+    url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG_ID, enable_gzip=True
+)
+influxdb_api = influxdb_client.write_api(
+    write_options=WriteOptions(
+        batch_size=INFLUXDB_BATCH_SIZE,
+        flush_interval=INFLUXDB_FLUSH_INTERVAL,
+        jitter_interval=2_000,
+        retry_interval=5_000,
+    )
+)
+# Flush any buffered points on exit
+atexit.register(influxdb_client.close)
+atexit.register(influxdb_api.close)
+
+# Posters run as scheduled jobs on a small shared pool rather than one
+# long-lived thread each
+poster_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="poster")
+poster_scheduler = sched.scheduler(time.monotonic, time.sleep)
+
+# Shared HTTP session, keeps connections alive between posts instead of doing
+# a fresh DNS lookup and TLS handshake for every request
+http_session = requests.Session()
+http_session.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=2,
+        pool_maxsize=4,
+        max_retries=Retry(total=2, backoff_factor=0.3),
+    ),
 )
-influxdb_api = influxdb_client.write_api(write_options=SYNCHRONOUS)
 
 # Setup Luftdaten
 LUFTDATEN_TIME_BETWEEN_POSTS = int(os.getenv("LUFTDATEN_TIME_BETWEEN_POSTS", "30"))
+LUFTDATEN_URL = "https://api.luftdaten.info/v1/push-sensor-data/"
+# Gzip the request bodies, only enable if the endpoint accepts Content-Encoding
+LUFTDATEN_GZIP = os.getenv("LUFTDATEN_GZIP", "false") == "true"
+# Connect and read timeouts
+LUFTDATEN_TIMEOUT = (5, 10)
 
 # Setup Safecast
 SAFECAST_TIME_BETWEEN_POSTS = int(os.getenv("SAFECAST_TIME_BETWEEN_POSTS", "300"))
@@ -330,6 +261,28 @@ SAFECAST_LATITUDE = os.getenv("SAFECAST_LATITUDE", "")
 SAFECAST_LONGITUDE = os.getenv("SAFECAST_LONGITUDE", "")
 SAFECAST_DEVICE_ID = int(os.getenv("SAFECAST_DEVICE_ID", "226"))
 SAFECAST_LOCATION_NAME = os.getenv("SAFECAST_LOCATION_NAME", "")
+# Fields shared by every measurement posted from this device
+SAFECAST_MEASUREMENT_BASE = {
+    "latitude": SAFECAST_LATITUDE,
+    "longitude": SAFECAST_LONGITUDE,
+    "device_id": SAFECAST_DEVICE_ID,  # Enviro+
+    "location_name": SAFECAST_LOCATION_NAME,
+    "height": None,
+}
+# (sensor data key, log label, Safecast unit) for every posted measurement
+SAFECAST_MEASUREMENTS = (
+    ("pm1", "PM1", "PM1 ug/m3"),
+    ("pm25", "PM2.5", "PM2.5 ug/m3"),
+    ("pm10", "PM10", "PM10 ug/m3"),
+    ("temperature", "Temperature", "Temperature C"),
+    ("humidity", "Humidity", "Humidity %"),
+    ("cpu_temperature", "CPU temperature", "CPU temperature C"),
+)
+# The measurements are independent requests, so submit them concurrently
+# rather than paying one round-trip after the other
+safecast_executor = ThreadPoolExecutor(
+    max_workers=len(SAFECAST_MEASUREMENTS), thread_name_prefix="safecast"
+)
 if SAFECAST_DEV_MODE:
     # Post to the dev API
     safecast = SafecastPy.SafecastPy(
@@ -344,57 +297,85 @@ else:
 
 # Setup Blues Notecard
 NOTECARD_TIME_BETWEEN_POSTS = int(os.getenv("NOTECARD_TIME_BETWEEN_POSTS", "600"))
+# Open Notecard connection, kept between posts
+notecard_port = None
+card = None
+# Unit of every sensor data key
+NOTECARD_UNITS = {
+    "temperature": "°C",
+    "cpu_temperature": "°C",
+    "humidity": "%RH",
+    "pressure": "hPa",
+    "oxidising": "kOhms",
+    "reducing": "kOhms",
+    "nh3": "kOhms",
+    "lux": "Lux",
+    "pm1": "ug/m3",
+    "pm25": "ug/m3",
+    "pm10": "ug/m3",
+    "battery_voltage": "V",
+    "battery_percentage": "%",
+    "proximity": None,
+    "aqi": None,
+}
+
+# Keep the CPU temperature file open, it is read on every poll
+cpu_temperature_fd = os.open("/sys/class/thermal/thermal_zone0/temp", os.O_RDONLY)
 
 # Setup LC709203F battery monitor
 if battery_sensor:
     logging.debug("## LC709203F battery monitor ##")
     try:
-        logging.debug(f"Sensor IC version: {hex(sensor.ic_version)}")
+        logging.debug("Sensor IC version: %s", hex(sensor.ic_version))
         # Set the battery pack size to 3000 mAh
         sensor.pack_size = PackSize.MAH3000
         sensor.init_RSOC()
-        logging.debug(f"Battery size: {PackSize.string[sensor.pack_sizes]}")
+        logging.debug("Battery size: %s", PackSize.string[sensor.pack_sizes])
     except RuntimeError as exception:
-        logging.error(f"Failed to read sensor with error: {exception}")
+        logging.error("Failed to read sensor with error: %s", exception)
         logging.info("Try setting the I2C clock speed to 10000Hz")
 
 
 def get_cpu_temperature():
     """Get the temperature from the Raspberry Pi CPU."""
-    with open("/sys/class/thermal/thermal_zone0/temp", "r") as f:
-        temp = f.read()
-        temp = int(temp) / 1000.0
-        CPU_TEMPERATURE.set(temp)
+    # sysfs regenerates the value on every read from offset 0
+    temp = int(os.pread(cpu_temperature_fd, 16, 0)) / 1000.0
+    CPU_TEMPERATURE.set(temp)
+    latest_values["cpu_temperature"] = temp
+    return temp
 
 
 def get_temperature(temperature_compensation):
-    """Get temperature from the weather sensor."""
+    """Get temperature from the last weather sensor update."""
     # Increase the temperature_compensation to reduce the temperature.
     # Decrease it to increase the temperature.
-    temperature = bme280.get_temperature()
+    temperature = bme280.temperature
 
     if temperature_compensation:
         temperature = temperature - temperature_compensation
 
     TEMPERATURE.set(temperature)  # Set to a given value
+    latest_values["temperature"] = float(temperature)
 
 
 def get_pressure():
-    """Get pressure from the weather sensor."""
-    pressure = bme280.get_pressure()
+    """Get pressure from the last weather sensor update."""
+    pressure = bme280.pressure
     PRESSURE.set(pressure)
+    latest_values["pressure"] = float(pressure)
 
 
 def get_humidity(humidity_compensation):
-    """Get humidity from the weather sensor."""
+    """Get humidity from the last weather sensor update."""
     # Increase the humidity_compensation to increase the humidity.
     # Decrease it to decrease the humidity.
-    humidity = bme280.get_humidity()
+    humidity = bme280.humidity
 
     if humidity_compensation:
         humidity = humidity + humidity_compensation
 
     HUMIDITY.set(humidity)
+    latest_values["humidity"] = float(humidity)
 
 
 def get_gas():
@@ -402,15 +383,18 @@ def get_gas():
     try:
         readings = gas.read_all()
     except (OSError, ValueError) as exception:
-        logging.warning(f"Failed to read gas sensor with error: {exception}")
+        logging.warning("Failed to read gas sensor with error: %s", exception)
     else:
         OXIDISING.set(readings.oxidising)
+        latest_values["oxidising"] = float(readings.oxidising)
         OXIDISING_HIST.observe(readings.oxidising)
 
         REDUCING.set(readings.reducing)
+        latest_values["reducing"] = float(readings.reducing)
         REDUCING_HIST.observe(readings.reducing)
 
         NH3.set(readings.nh3)
+        latest_values["nh3"] = float(readings.nh3)
         NH3_HIST.observe(readings.nh3)
 
 
@@ -420,35 +404,55 @@ def get_light():
         lux = ltr559.get_lux()
         prox = ltr559.get_proximity()
     except OSError as exception:
-        logging.warning(f"Failed to read light sensor with error: {exception}")
+        logging.warning("Failed to read light sensor with error: %s", exception)
     else:
         LUX.set(lux)
         PROXIMITY.set(prox)
+        latest_values["lux"] = float(lux)
+        latest_values["proximity"] = float(prox)
+
+
+def read_particulates():
+    """Continuously read the PMS5003 for get_particulates."""
+    global latest_pms_data
+    while True:
+        try:
+            latest_pms_data = pms5003.read()
+        except (pmsReadTimeoutError, pmsSerialTimeoutError, pmsChecksumMismatchError):
+            logging.warning("Failed to read PMS5003")
+        except Exception as exception:
+            # Keep the thread alive, a dead reader would leave the PM values stale
+            logging.warning("Failed to read PMS5003 with error: %s", exception)
+            time.sleep(1)
 
 
 def get_particulates():
     """Get the particulate matter readings."""
-    try:
-        pms_data = pms5003.read()
-    except (pmsReadTimeoutError, pmsSerialTimeoutError, pmsChecksumMismatchError):
-        logging.warning("Failed to read PMS5003")
-    else:
-        PM1.set(pms_data.pm_ug_per_m3(1.0))
-        PM25.set(pms_data.pm_ug_per_m3(2.5))
-        PM10.set(pms_data.pm_ug_per_m3(10))
-
-        PM1_HIST.observe(pms_data.pm_ug_per_m3(1.0))
-        PM25_HIST.observe(pms_data.pm_ug_per_m3(2.5) - pms_data.pm_ug_per_m3(1.0))
-        PM10_HIST.observe(pms_data.pm_ug_per_m3(10) - pms_data.pm_ug_per_m3(2.5))
-
-        myaqi = aqi.to_aqi(
-            [
-                (aqi.POLLUTANT_PM25, pms_data.pm_ug_per_m3(2.5)),
-                (aqi.POLLUTANT_PM10, pms_data.pm_ug_per_m3(10)),
-            ]
-        )
+    global latest_pms_data
+    # Take the frame so it is only counted once in the histograms. A frame
+    # published between these two steps is dropped, the next one replaces it.
+    pms_data = latest_pms_data
+    latest_pms_data = None
+    if pms_data is not None:
+        pm1 = pms_data.pm_ug_per_m3(1.0)
+        pm25 = pms_data.pm_ug_per_m3(2.5)
+        pm10 = pms_data.pm_ug_per_m3(10)
+
+        PM1.set(pm1)
+        PM25.set(pm25)
+        PM10.set(pm10)
+        latest_values["pm1"] = float(pm1)
+        latest_values["pm25"] = float(pm25)
+        latest_values["pm10"] = float(pm10)
+
+        PM1_HIST.observe(pm1)
+        PM25_HIST.observe(pm25 - pm1)
+        PM10_HIST.observe(pm10 - pm25)
+
+        myaqi = pm_to_aqi(pm25, pm10)
 
         AQI.set(myaqi)
+        latest_values["aqi"] = float(myaqi)
         AQI_HIST.observe(float(myaqi))
 
 
@@ -459,279 +463,299 @@ def get_battery():
         percentage_reading = sensor.cell_percent
         BATTERY_VOLTAGE.set(voltage_reading)
         BATTERY_PERCENTAGE.set(percentage_reading)
-        logging.debug(f"Battery: {sensor.cell_voltage} Volts / {sensor.cell_percent} %")
+        latest_values["battery_voltage"] = float(voltage_reading)
+        latest_values["battery_percentage"] = float(percentage_reading)
+        logging.debug("Battery: %s Volts / %s %%", voltage_reading, percentage_reading)
     except (RuntimeError, OSError) as exception:
-        logging.warning(f"Failed to read battery monitor with error: {exception}")
+        logging.warning("Failed to read battery monitor with error: %s", exception)
+
+
+def get_i2c_sensors(temperature_compensation, humidity_compensation):
+    """Get the readings of every sensor on the I2C bus, one after the other."""
+    # One burst read of the BME280 covers temperature, humidity and pressure
+    bme280.update_sensor()
+    get_temperature(temperature_compensation)
+    get_humidity(humidity_compensation)
+    get_pressure()
+    get_light()
+    get_gas()
+    if battery_sensor:
+        get_battery()
 
 
 def collect_all_data():
     """Collects all the data currently set."""
-    sensor_data = {"temperature": TEMPERATURE.collect()[0].samples[0].value}
-    sensor_data["humidity"] = HUMIDITY.collect()[0].samples[0].value
-    sensor_data["pressure"] = PRESSURE.collect()[0].samples[0].value
-    sensor_data["oxidising"] = OXIDISING.collect()[0].samples[0].value
-    sensor_data["reducing"] = REDUCING.collect()[0].samples[0].value
-    sensor_data["nh3"] = NH3.collect()[0].samples[0].value
-    sensor_data["lux"] = LUX.collect()[0].samples[0].value
-    sensor_data["proximity"] = PROXIMITY.collect()[0].samples[0].value
-    sensor_data["pm1"] = PM1.collect()[0].samples[0].value
-    sensor_data["pm25"] = PM25.collect()[0].samples[0].value
-    sensor_data["pm10"] = PM10.collect()[0].samples[0].value
-    sensor_data["cpu_temperature"] = CPU_TEMPERATURE.collect()[0].samples[0].value
-    sensor_data["battery_voltage"] = BATTERY_VOLTAGE.collect()[0].samples[0].value
-    sensor_data["battery_percentage"] = BATTERY_PERCENTAGE.collect()[0].samples[0].value
-    sensor_data["aqi"] = AQI.collect()[0].samples[0].value
+    return dict(latest_values)
+
+
+def publish_sensor_data():
+    """Snapshot the current readings and share them with the posting threads."""
+    sensor_data = collect_all_data()
+    with latest_sensor_data_lock:
+        latest_sensor_data.clear()
+        latest_sensor_data.update(sensor_data)
+    latest_sensor_data_ready.set()
     return sensor_data
 
 
+def get_sensor_data():
+    """Get a copy of the latest published readings."""
+    latest_sensor_data_ready.wait()
+    with latest_sensor_data_lock:
+        return dict(latest_sensor_data)
+
+
+def refresh_external_aqi():
+    """Refresh the external AQI from WAQI in the background."""
+    global external_aqi
+    next_refresh = time.monotonic()
+    while True:
+        next_refresh = sleep_until(next_refresh, WAQI_TIME_BETWEEN_REFRESHES)
+        # A TTL well under the interval means each scheduled refresh fetches
+        fetched_aqi = get_external_AQI(
+            LATITUDE,
+            LONGITUDE,
+            WAQI_API_KEY,
+            session=http_session,
+            cache_ttl=WAQI_TIME_BETWEEN_REFRESHES / 2,
+        )
+        if fetched_aqi >= 0:
+            external_aqi = fetched_aqi
+            EXTERNAL_AQI.set(external_aqi)
+        else:
+            # Keep showing the last good value and try again soon
+            next_refresh = time.monotonic() + WAQI_RETRY_DELAY
+
+
+def sleep_until(deadline, interval):
+    """Sleep until the monotonic deadline and return the following deadline.
+
+    Scheduling against deadlines keeps the cadence steady however long the
+    work takes. When more than a whole interval behind, the schedule restarts
+    from now instead of running back-to-back to catch up."""
+    delay = deadline - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+    return next_deadline(deadline, interval)
+
+
+def next_deadline(deadline, interval):
+    """Get the monotonic deadline after this one, restarting the schedule from
+    now when more than a whole interval behind."""
+    now = time.monotonic()
+    if now - deadline > interval:
+        return now + interval
+    return deadline + interval
+
+
+def schedule_posts(post, interval):
+    """Run post on the poster pool every interval seconds.
+
+    Posts are scheduled against monotonic deadlines so the cadence stays
+    steady however long a post takes. A round is skipped rather than queued
+    while the previous post is still running."""
+    running = None
+
+    def submit(deadline):
+        nonlocal running
+        if running is None or running.done():
+            running = poster_executor.submit(post)
+            running.add_done_callback(log_post_exception)
+        else:
+            logging.warning("%s still running, skipping this round", post.__name__)
+        next_post = next_deadline(deadline, interval)
+        poster_scheduler.enterabs(next_post, 0, submit, (next_post,))
+
+    first_post = time.monotonic() + interval
+    poster_scheduler.enterabs(first_post, 0, submit, (first_post,))
+
+
+def log_post_exception(future):
+    """Log an exception raised by a post."""
+    # The pool would otherwise swallow it
+    exception = future.exception()
+    if exception is not None:
+        logging.error("Unhandled exception while posting: %r", exception)
+
+
 def post_to_influxdb():
     """Post all sensor data to InfluxDB."""
-    while True:
-        time.sleep(INFLUXDB_TIME_BETWEEN_POSTS)
-        round(time.time())
-        sensor_data = collect_all_data()
-        data_points = [
-            Point("enviroplus")
-            .tag("location", INFLUXDB_SENSOR_LOCATION)
-            .field(field_name, sensor_data[field_name])
-            for field_name in sensor_data
-        ]
-        try:
-            influxdb_api.write(bucket=INFLUXDB_BUCKET, record=data_points)
-            logging.debug("InfluxDB response: OK")
-        except Exception as exception:
-            logging.warning(f"Exception sending to InfluxDB: {exception}")
+    sensor_data = get_sensor_data()
+    # All readings share the measurement and tags, so send one point.
+    # Points are written in batches, so each needs its own timestamp.
+    data_point = (
+        Point("enviroplus")
+        .tag("location", INFLUXDB_SENSOR_LOCATION)
+        .time(time.time_ns())
+    )
+    for field_name, value in sensor_data.items():
+        data_point.field(field_name, value)
+    try:
+        influxdb_api.write(bucket=INFLUXDB_BUCKET, record=data_point)
+        logging.debug("InfluxDB point queued")
+    except Exception as exception:
+        logging.warning("Exception sending to InfluxDB: %s", exception)
+
+
+@functools.lru_cache(maxsize=2)
+def luftdaten_headers(pin):
+    """Get the request headers for a Luftdaten sensor pin."""
+    headers = {
+        "X-PIN": pin,
+        "X-Sensor": f"raspi-{get_serial_number()}",
+        "Content-Type": "application/json",
+        "cache-control": "no-cache",
+    }
+    if LUFTDATEN_GZIP:
+        headers["Content-Encoding"] = "gzip"
+    return headers
+
+
+def post_to_luftdaten_pin(pin, payload):
+    """Post a JSON payload for one Luftdaten sensor pin."""
+    headers = luftdaten_headers(pin)
+    if not LUFTDATEN_GZIP:
+        return http_session.post(
+            LUFTDATEN_URL, json=payload, headers=headers, timeout=LUFTDATEN_TIMEOUT
+        )
+    return http_session.post(
+        LUFTDATEN_URL,
+        data=gzip.compress(json.dumps(payload).encode(), compresslevel=6),
+        headers=headers,
+        timeout=LUFTDATEN_TIMEOUT,
+    )
 
 
 def post_to_luftdaten():
     """Post relevant sensor data to luftdaten.info."""
     """Code from: https://github.com/sepulworld/balena-environ-plus"""
-    LUFTDATEN_SENSOR_UID = f"raspi-{get_serial_number()}"
-    while True:
-        time.sleep(LUFTDATEN_TIME_BETWEEN_POSTS)
-        sensor_data = collect_all_data()
-        values = {
-            "P2": sensor_data["pm25"],
-            "P1": sensor_data["pm10"],
-            "temperature": "{:.2f}".format(sensor_data["temperature"]),
-            "pressure": "{:.2f}".format(sensor_data["pressure"] * 100),
-            "humidity": "{:.2f}".format(sensor_data["humidity"]),
-        }
-        pm_values = dict(i for i in values.items() if i[0].startswith("P"))
-        temperature_values = dict(i for i in values.items() if not i[0].startswith("P"))
-        try:
-            response_pin_1 = requests.post(
-                "https://api.luftdaten.info/v1/push-sensor-data/",
-                json={
+    sensor_data = get_sensor_data()
+    pins = {}
+    if "pm25" in sensor_data and "pm10" in sensor_data:
+        pins["1"] = [
+            {"value_type": "P2", "value": sensor_data["pm25"]},
+            {"value_type": "P1", "value": sensor_data["pm10"]},
+        ]
+    if all(key in sensor_data for key in ("temperature", "pressure", "humidity")):
+        pins["11"] = [
+            {"value_type": "temperature", "value": f"{sensor_data['temperature']:.2f}"},
+            {"value_type": "pressure", "value": f"{sensor_data['pressure'] * 100:.2f}"},
+            {"value_type": "humidity", "value": f"{sensor_data['humidity']:.2f}"},
+        ]
+    if not pins:
+        logging.warning("No sensor data to post to Luftdaten")
+        return
+    try:
+        responses = [
+            post_to_luftdaten_pin(
+                pin,
+                {
                     "software_version": "enviro-plus 0.0.1",
-                    "sensordatavalues": [
-                        {"value_type": key, "value": val}
-                        for key, val in pm_values.items()
-                    ],
-                },
-                headers={
-                    "X-PIN": "1",
-                    "X-Sensor": LUFTDATEN_SENSOR_UID,
-                    "Content-Type": "application/json",
-                    "cache-control": "no-cache",
-                },
-            )
-
-            response_pin_11 = requests.post(
-                "https://api.luftdaten.info/v1/push-sensor-data/",
-                json={
-                    "software_version": "enviro-plus 0.0.1",
-                    "sensordatavalues": [
-                        {"value_type": key, "value": val}
-                        for key, val in temperature_values.items()
-                    ],
-                },
-                headers={
-                    "X-PIN": "11",
-                    "X-Sensor": LUFTDATEN_SENSOR_UID,
-                    "Content-Type": "application/json",
-                    "cache-control": "no-cache",
+                    "sensordatavalues": values,
                 },
             )
+            for pin, values in pins.items()
+        ]
 
-            if response_pin_1.ok and response_pin_11.ok:
-                logging.debug("Luftdaten response: OK")
-            else:
-                logging.warning("Luftdaten response: Failed")
-        except Exception as exception:
-            logging.warning(f"Exception sending to Luftdaten: {exception}")
+        if all(response.ok for response in responses):
+            logging.debug("Luftdaten response: OK")
+        else:
+            logging.warning("Luftdaten response: Failed")
+    except Exception as exception:
+        logging.warning("Exception sending to Luftdaten: %s", exception)
 
 
 def post_to_safecast():
     """Post all sensor data to Safecast.org."""
-    while True:
-        time.sleep(SAFECAST_TIME_BETWEEN_POSTS)
-        sensor_data = collect_all_data()
-        try:
-            measurement = safecast.add_measurement(
-                json={
-                    "latitude": SAFECAST_LATITUDE,
-                    "longitude": SAFECAST_LONGITUDE,
-                    "value": sensor_data["pm1"],
-                    "unit": "PM1 ug/m3",
-                    "captured_at": datetime.datetime.now().astimezone().isoformat(),
-                    "device_id": SAFECAST_DEVICE_ID,  # Enviro+
-                    "location_name": SAFECAST_LOCATION_NAME,
-                    "height": None,
-                }
-            )
-            logging.debug(f'Safecast PM1 measurement created, id: {measurement["id"]}')
-
-            measurement = safecast.add_measurement(
-                json={
-                    "latitude": SAFECAST_LATITUDE,
-                    "longitude": SAFECAST_LONGITUDE,
-                    "value": sensor_data["pm25"],
-                    "unit": "PM2.5 ug/m3",
-                    "captured_at": datetime.datetime.now().astimezone().isoformat(),
-                    "device_id": SAFECAST_DEVICE_ID,  # Enviro+
-                    "location_name": SAFECAST_LOCATION_NAME,
-                    "height": None,
-                }
-            )
-            logging.debug(
-                f'Safecast PM2.5 measurement created, id: {measurement["id"]}'
-            )
-
-            measurement = safecast.add_measurement(
-                json={
-                    "latitude": SAFECAST_LATITUDE,
-                    "longitude": SAFECAST_LONGITUDE,
-                    "value": sensor_data["pm10"],
-                    "unit": "PM10 ug/m3",
-                    "captured_at": datetime.datetime.now().astimezone().isoformat(),
-                    "device_id": SAFECAST_DEVICE_ID,  # Enviro+
-                    "location_name": SAFECAST_LOCATION_NAME,
-                    "height": None,
-                }
-            )
-            logging.debug(f'Safecast PM10 measurement created, id: {measurement["id"]}')
-
-            measurement = safecast.add_measurement(
-                json={
-                    "latitude": SAFECAST_LATITUDE,
-                    "longitude": SAFECAST_LONGITUDE,
-                    "value": sensor_data["temperature"],
-                    "unit": "Temperature C",
-                    "captured_at": datetime.datetime.now().astimezone().isoformat(),
-                    "device_id": SAFECAST_DEVICE_ID,  # Enviro+
-                    "location_name": SAFECAST_LOCATION_NAME,
-                    "height": None,
-                }
-            )
-            logging.debug(
-                f'Safecast Temperature measurement created, id: {measurement["id"]}'
-            )
-
-            measurement = safecast.add_measurement(
-                json={
-                    "latitude": SAFECAST_LATITUDE,
-                    "longitude": SAFECAST_LONGITUDE,
-                    "value": sensor_data["humidity"],
-                    "unit": "Humidity %",
-                    "captured_at": datetime.datetime.now().astimezone().isoformat(),
-                    "device_id": SAFECAST_DEVICE_ID,  # Enviro+
-                    "location_name": SAFECAST_LOCATION_NAME,
-                    "height": None,
-                }
-            )
-            logging.debug(
-                f'Safecast Humidity measurement created, id: {measurement["id"]}'
-            )
-
-            measurement = safecast.add_measurement(
-                json={
-                    "latitude": SAFECAST_LATITUDE,
-                    "longitude": SAFECAST_LONGITUDE,
-                    "value": sensor_data["cpu_temperature"],
-                    "unit": "CPU temperature C",
-                    "captured_at": datetime.datetime.now().astimezone().isoformat(),
-                    "device_id": SAFECAST_DEVICE_ID,  # Enviro+
-                    "location_name": SAFECAST_LOCATION_NAME,
-                    "height": None,
-                }
-            )
+    sensor_data = get_sensor_data()
+    captured_at = datetime.now().astimezone().isoformat()
+    # Only post the readings that have been taken
+    measurements_to_post = [
+        measurement
+        for measurement in SAFECAST_MEASUREMENTS
+        if measurement[0] in sensor_data
+    ]
+    bodies = [
+        {
+            **SAFECAST_MEASUREMENT_BASE,
+            "value": sensor_data[key],
+            "unit": unit,
+            "captured_at": captured_at,
+        }
+        for key, _, unit in measurements_to_post
+    ]
+    try:
+        measurements = safecast_executor.map(
+            lambda body: safecast.add_measurement(json=body), bodies
+        )
+        for (_, label, _), measurement in zip(measurements_to_post, measurements):
             logging.debug(
-                f'Safecast CPU temperature measurement created, id: {measurement["id"]}'
+                "Safecast %s measurement created, id: %s", label, measurement["id"]
             )
-        except Exception as exception:
-            logging.warning(f"Exception sending to Safecast: {exception}")
+    except Exception as exception:
+        logging.warning("Exception sending to Safecast: %s", exception)
 
 
 def post_to_notehub():
     """Post all sensor data to Notehub.io."""
-    while True:
-        time.sleep(NOTECARD_TIME_BETWEEN_POSTS)
-        try:
+    global notecard_port, card
+    try:
+        # Keep the port open between posts, reopen it only after an error
+        if card is None:
             notecard_port = Serial("/dev/ttyACM0", 9600)
             card = notecard.OpenSerial(notecard_port)
-            # Setup data
-            sensor_data = collect_all_data()
-            for sensor_data_key in sensor_data:
-                data_unit = None
-                if "temperature" in sensor_data_key:
-                    data_unit = "°C"
-                elif "humidity" in sensor_data_key:
-                    data_unit = "%RH"
-                elif "pressure" in sensor_data_key:
-                    data_unit = "hPa"
-                elif (
-                    "oxidising" in sensor_data_key
-                    or "reducing" in sensor_data_key
-                    or "nh3" in sensor_data_key
-                ):
-                    data_unit = "kOhms"
-                elif "proximity" in sensor_data_key:
-                    pass
-                elif "lux" in sensor_data_key:
-                    data_unit = "Lux"
-                elif "pm" in sensor_data_key:
-                    data_unit = "ug/m3"
-                elif "battery_voltage" in sensor_data_key:
-                    data_unit = "V"
-                elif "battery_percentage" in sensor_data_key:
-                    data_unit = "%"
-                request = {
-                    "req": "note.add",
-                    "body": {
-                        sensor_data_key: sensor_data[sensor_data_key],
-                        "units": data_unit,
-                    },
-                }
-                try:
-                    response = card.Transaction(request)
-                    logging.debug(f"Notecard response: {response}")
-                except Exception as exception:
-                    logging.warning(f"Notecard data setup error: {exception}")
-            # Sync data with Notehub
-            request = {"req": "service.sync"}
-            try:
-                response = card.Transaction(request)
-                logging.debug(f"Notecard response: {response}")
-            except Exception as exception:
-                logging.warning(f"Notecard sync error: {exception}")
-        except Exception as exception:
-            # TODO: Do we need to reboot here? Or is this missing tty temporary?
-            logging.warning(f"Error opening notecard: {exception}")
+    except Exception as exception:
+        # TODO: Do we need to reboot here? Or is this missing tty temporary?
+        logging.warning("Error opening notecard: %s", exception)
+        return
+    # Setup data as a single note, one round-trip over the serial link
+    sensor_data = get_sensor_data()
+    request = {
+        "req": "note.add",
+        "body": {
+            key: {"value": value, "units": NOTECARD_UNITS[key]}
+            for key, value in sensor_data.items()
+        },
+    }
+    try:
+        response = card.Transaction(request)
+        logging.debug("Notecard response: %s", response)
+        # Sync data with Notehub
+        response = card.Transaction({"req": "service.sync"})
+        logging.debug("Notecard response: %s", response)
+    except Exception as exception:
+        logging.warning("Notecard transaction error: %s", exception)
+        try:
+            notecard_port.close()
+        except Exception:
+            pass
+        notecard_port = None
+        card = None
 
 
+@functools.lru_cache(maxsize=1)
 def get_serial_number():
     """Get Raspberry Pi serial number to use as LUFTDATEN_SENSOR_UID."""
-    with open("/proc/cpuinfo", "r") as f:
-        for line in f:
-            if line[:6] == "Serial":
-                return str(line.split(":")[1].strip())
+    with open("/proc/cpuinfo", "rb") as f:
+        # Leading newline so a Serial line at the very start still matches
+        cpuinfo = b"\n" + f.read()
+    start = cpuinfo.find(b"\nSerial")
+    if start == -1:
+        return None
+    start = cpuinfo.index(b":", start) + 1
+    end = cpuinfo.find(b"\n", start)
+    return cpuinfo[start : end if end != -1 else None].decode().strip()
+
+
+FALSE_STRINGS = frozenset(("false", "f", "0", "no", "n"))
+TRUE_STRINGS = frozenset(("true", "t", "1", "yes", "y"))
 
 
 def str_to_bool(value):
-    if value.lower() in {"false", "f", "0", "no", "n"}:
+    lowered = value.lower()
+    if lowered in FALSE_STRINGS:
         return False
-    elif value.lower() in {"true", "t", "1", "yes", "y"}:
+    elif lowered in TRUE_STRINGS:
         return True
     raise ValueError(f"{value} is not a valid boolean value")
 
@@ -793,24 +817,32 @@ def x_from_sun_moon_time(progress, period, x_range):
     return x
 
 
+@functools.lru_cache(maxsize=4)
+def lookup_city(city_name):
+    """Look up a city in the astral database once."""
+    return lookup(city_name, database())
+
+
+@functools.lru_cache(maxsize=8)
+def sun_events(city_name, date):
+    """Calculate the sun events for a city on a given date once."""
+    return sun(lookup_city(city_name).observer, date=date)
+
+
 def sun_moon_time(city_name, time_zone):
     """Calculate the progress through the current sun/moon period (i.e day or
     night) from the last sunrise or sunset, given a datetime object 't'."""
 
-    city = lookup(city_name, database())
-
     # Datetime objects for yesterday, today, tomorrow
-    utc = pytz.utc
-    utc_dt = datetime.now(tz=utc)
-    local_dt = utc_dt.astimezone(pytz.timezone(time_zone))
+    local_dt = datetime.now(tz=pytz.timezone(time_zone))
     today = local_dt.date()
     yesterday = today - timedelta(1)
     tomorrow = today + timedelta(1)
 
     # Sun objects for yesterday, today, tomorrow
-    sun_yesterday = sun(city.observer, date=yesterday)
-    sun_today = sun(city.observer, date=today)
-    sun_tomorrow = sun(city.observer, date=tomorrow)
+    sun_yesterday = sun_events(city_name, yesterday)
+    sun_today = sun_events(city_name, today)
+    sun_tomorrow = sun_events(city_name, tomorrow)
 
     # Work out sunset yesterday, sunrise/sunset today, and sunrise tomorrow
     sunset_yesterday = sun_yesterday["sunset"]
@@ -844,9 +876,9 @@ def sun_moon_time(city_name, time_zone):
     return (progress, period, day, local_dt)
 
 
-def draw_background(progress, period, day, aqi):
-    """Given an amount of progress through the day or night, draw the
-    background colour and overlay a blurred sun/moon."""
+def background_key(progress, period, day, aqi):
+    """Get the (colour, x, y) of the background for a point in the day or
+    night, with the sun/moon snapped to a coarse grid."""
 
     # x-coordinate for sun/moon
     x = x_from_sun_moon_time(progress, period, WIDTH)
@@ -855,37 +887,55 @@ def draw_background(progress, period, day, aqi):
     if day:
         x = WIDTH - x
 
-    # Calculate position on sun/moon's curve
-    centre = WIDTH / 2
-    y = calculate_y_pos(x, centre)
+    # Snap to a coarse grid so consecutive frames share a cached background
+    x = min(round(x / BACKGROUND_CACHE_STEP) * BACKGROUND_CACHE_STEP, WIDTH)
+
+    # Position on sun/moon's curve, background colour from the AQI
+    return aqi_to_color(aqi), x, sun_curve[x]
+
 
-    # Background colour
-    background = aqi_to_color(aqi)
+def draw_background(key):
+    """Given a background key, draw the background colour and overlay a
+    blurred sun/moon."""
+    background, x, y = key
+
+    # Reuse the background while the inputs are unchanged. Callers draw on
+    # the result, hence the copy.
+    if key in background_cache:
+        background_cache.move_to_end(key)
+        return background_cache[key].copy()
 
     # New image for background colour
     img = Image.new("RGBA", (WIDTH, HEIGHT), color=background)
-    Image.new("RGBA", (WIDTH, HEIGHT), color=(0, 0, 0))
-    # draw = ImageDraw.Draw(img)
 
-    # New image for sun/moon overlay
-    overlay = Image.new("RGBA", (WIDTH, HEIGHT), color=(0, 0, 0, 0))
-    overlay_draw = ImageDraw.Draw(overlay)
+    # Overlay the pre-blurred sun/moon on the background as an alpha matte.
+    # Cropping outside the sprite pads with transparent pixels.
+    half = sun_sprite.width // 2
+    overlay = sun_sprite.crop((half - x, half - y, half - x + WIDTH, half - y + HEIGHT))
+    composite = Image.alpha_composite(img, overlay)
 
-    # Draw the sun/moon
-    circle = circle_coordinates(x, y, sun_radius)
-    overlay_draw.ellipse(circle, fill=(200, 200, 50, opacity))
+    background_cache[key] = composite
+    if len(background_cache) > BACKGROUND_CACHE_SIZE:
+        background_cache.popitem(last=False)
+
+    return composite.copy()
 
-    # Overlay the sun/moon on the background as an alpha matte
-    composite = Image.alpha_composite(img, overlay).filter(
-        ImageFilter.GaussianBlur(radius=blur)
-    )
 
-    return composite
+@functools.lru_cache(maxsize=1)
+def date_label(date):
+    """Format the date for the display."""
+    return date.strftime("%Y-%b-%d").lstrip("0")
+
+
+@functools.lru_cache(maxsize=256)
+def text_size(font, text):
+    """Get the rendered (width, height) of text."""
+    return font.getsize(text)
 
 
 def overlay_text(img, position, text, font, align_right=False, rectangle=False):
     draw = ImageDraw.Draw(img)
-    w, h = font.getsize(text)
+    w, h = text_size(font, text)
     if align_right:
         x, y = position
         x -= w
@@ -895,76 +945,113 @@ def overlay_text(img, position, text, font, align_right=False, rectangle=False):
         y += 1
         position = (x, y)
         border = 1
-        rect = (x - border, y, x + w, y + h + border)
-        rect_img = Image.new("RGBA", (WIDTH, HEIGHT), color=(0, 0, 0, 0))
+        # Only allocate the area under the label rather than a full frame
+        rect_img = Image.new("RGBA", (w + border + 1, h + border + 1), (0, 0, 0, 0))
         rect_draw = ImageDraw.Draw(rect_img)
-        rect_draw.rectangle(rect, (255, 255, 255))
-        rect_draw.text(position, text, font=font, fill=(0, 0, 0, 0))
-        img = Image.alpha_composite(img, rect_img)
+        rect_draw.rectangle((0, 0, w + border, h + border), (255, 255, 255))
+        rect_draw.text((border, 0), text, font=font, fill=(0, 0, 0, 0))
+        img.alpha_composite(rect_img, dest=(x - border, y))
     else:
         draw.text(position, text, font=font, fill=(255, 255, 255))
     return img
 
 
-def get_cpu_temperature():
-    with open("/sys/class/thermal/thermal_zone0/temp", "r") as f:
-        temp = f.read()
-        temp = int(temp) / 1000.0
-    return temp
-
-
 def correct_humidity(humidity, temperature, corr_temperature):
-    dewpoint = temperature - ((100 - humidity) / 5)
-    corr_humidity = 100 - (5 * (corr_temperature - dewpoint))
-    return min(100, corr_humidity)
+    # Approximating the dewpoint as temperature - (100 - humidity) / 5 and
+    # solving back for humidity at the corrected temperature reduces to this
+    return min(100, humidity + 5 * (temperature - corr_temperature))
+
+
+def add_pressure_sample(pressure, t):
+    """Add a sample to the pressure window, keeping its running sums in step."""
+    global pressure_samples_since_rebase
+    if len(pressure_vals) == pressure_vals.maxlen:
+        x = time_vals[0] - pressure_origin[0]
+        y = pressure_vals[0] - pressure_origin[1]
+        pressure_sums[0] -= x
+        pressure_sums[1] -= y
+        pressure_sums[2] -= x * x
+        pressure_sums[3] -= x * y
+        pressure_sums[4] -= y * y
+    pressure_vals.append(pressure)
+    time_vals.append(t)
+    pressure_samples_since_rebase += 1
+    if pressure_samples_since_rebase >= pressure_vals.maxlen:
+        # Recompute from scratch once the window has turned over, so rounding
+        # errors from the running updates can't build up
+        rebase_pressure_sums()
+    else:
+        x = t - pressure_origin[0]
+        y = pressure - pressure_origin[1]
+        pressure_sums[0] += x
+        pressure_sums[1] += y
+        pressure_sums[2] += x * x
+        pressure_sums[3] += x * y
+        pressure_sums[4] += y * y
+
+
+def rebase_pressure_sums():
+    """Recompute the running sums relative to the oldest sample in the window.
+
+    Keeping the values relative to an origin near the window avoids losing
+    precision to the large epoch timestamps and absolute pressures."""
+    global pressure_samples_since_rebase
+    pressure_origin[0] = time_vals[0]
+    pressure_origin[1] = pressure_vals[0]
+    pressure_sums[:] = [0.0] * 5
+    for t, pressure in zip(time_vals, pressure_vals):
+        x = t - pressure_origin[0]
+        y = pressure - pressure_origin[1]
+        pressure_sums[0] += x
+        pressure_sums[1] += y
+        pressure_sums[2] += x * x
+        pressure_sums[3] += x * y
+        pressure_sums[4] += y * y
+    pressure_samples_since_rebase = 0
+
+
+# Upper bound (inclusive) of the hourly pressure change for each trend arrow
+TREND_THRESHOLDS = (0.5, 3)
+TREND_RISING = ("-", ">", ">>")
+TREND_FALLING = ("-", "<", "<<")
 
 
 def analyse_pressure(pressure, t):
-    global time_vals, pressure_vals, trend
-    if len(pressure_vals) > num_vals:
-        pressure_vals = pressure_vals[1:] + [pressure]
-        time_vals = time_vals[1:] + [t]
-        line = numpy.polyfit(time_vals, pressure_vals, 1, full=True)
-        slope = line[0][0]
-        intercept = line[0][1]
-        variance = numpy.var(pressure_vals)
-        residuals = numpy.var(
-            [slope * x + intercept - y for x, y in zip(time_vals, pressure_vals)]
-        )
-
-        r_squared = 1 - residuals / variance
+    global trend
+    if not pressure_vals:
+        pressure_origin[:] = [t, pressure]
+    full = len(pressure_vals) > num_vals
+    add_pressure_sample(pressure, t)
+    n = len(pressure_vals)
+    sum_x, sum_y, sum_xx, sum_xy, sum_yy = pressure_sums
+    mean_pressure = pressure_origin[1] + sum_y / n
+    if full:
+        # Closed form least squares fit of pressure against time
+        s_xx = sum_xx - sum_x * sum_x / n
+        s_xy = sum_xy - sum_x * sum_y / n
+        s_yy = sum_yy - sum_y * sum_y / n
+        slope = s_xy / s_xx if s_xx > 0 else 0.0
+        r_squared = s_xy * s_xy / (s_xx * s_yy) if s_xx > 0 and s_yy > 0 else 0.0
         change_per_hour = slope * 60 * 60
-        mean_pressure = numpy.mean(pressure_vals)
         if r_squared > 0.5:
-            if change_per_hour > 0.5:
-                trend = ">"
-            elif change_per_hour < -0.5:
-                trend = "<"
-            else:
-                trend = "-"
-            if trend != "-" and abs(change_per_hour) > 3:
-                trend *= 2
+            arrows = TREND_RISING if change_per_hour > 0 else TREND_FALLING
+            trend = arrows[bisect_left(TREND_THRESHOLDS, abs(change_per_hour))]
     else:
-        pressure_vals.append(pressure)
-        time_vals.append(t)
-        mean_pressure = numpy.mean(pressure_vals)
         change_per_hour = 0
         trend = "-"
     return mean_pressure, change_per_hour, trend
 
 
+# Lower bound (inclusive) of every description after the first
+PRESSURE_THRESHOLDS = (970, 990, 1010, 1030)
+PRESSURE_DESCRIPTIONS = ("storm", "rain", "change", "good", "dry")
+LIGHT_THRESHOLDS = (50, 100, 500)
+LIGHT_DESCRIPTIONS = ("dark", "dim", "light", "bright")
+
+
 def describe_pressure(pressure):
     """Convert pressure into barometer-type description."""
-    if pressure < 970:
-        return "storm"
-    elif 970 <= pressure < 990:
-        return "rain"
-    elif 990 <= pressure < 1010:
-        return "change"
-    elif 1010 <= pressure < 1030:
-        return "good"
-    else:
-        return "dry"
+    return PRESSURE_DESCRIPTIONS[bisect_right(PRESSURE_THRESHOLDS, pressure)]
 
 
 def describe_humidity(humidity):
@@ -974,14 +1061,7 @@ def describe_humidity(humidity):
 
 def describe_light(light):
     """Convert light level in lux to descriptive value."""
-    if light < 50:
-        return "dark"
-    elif 50 <= light < 100:
-        return "dim"
-    elif 100 <= light < 500:
-        return "light"
-    else:
-        return "bright"
+    return LIGHT_DESCRIPTIONS[bisect_right(LIGHT_THRESHOLDS, light)]
 
 
 # Initialise the LCD
@@ -1007,299 +1087,378 @@ day_hue = 25
 
 sun_radius = 50
 
+
+def render_sun_sprite():
+    """Draw the blurred sun/moon on a transparent square."""
+    size = 2 * (sun_radius + 3 * blur)
+    # Transparent pixels share the sun's colour so the blur doesn't darken the edge
+    sprite = Image.new("RGBA", (size, size), color=(200, 200, 50, 0))
+    sprite_draw = ImageDraw.Draw(sprite)
+    circle = circle_coordinates(size // 2, size // 2, sun_radius)
+    sprite_draw.ellipse(circle, fill=(200, 200, 50, opacity))
+    return sprite.filter(ImageFilter.GaussianBlur(radius=blur))
+
+
+sun_sprite = render_sun_sprite()
+
+# y-coordinate of the sun/moon for every x-coordinate across the display
+sun_curve = tuple(calculate_y_pos(x, WIDTH / 2) for x in range(WIDTH + 1))
+
+# Blurred backgrounds, keyed on (colour, sun x, sun y)
+BACKGROUND_CACHE_SIZE = 32
+BACKGROUND_CACHE_STEP = 4
+background_cache = OrderedDict()
+
 # Fonts
 font_sm = ImageFont.truetype(UserFont, 12)
 font_lg = ImageFont.truetype(UserFont, 14)
 
 # Margins
 margin = 3
+right_margin = WIDTH - margin
 
+# Gap below a line of large text. The labels are digits, capitals and symbols
+# that sit on the baseline, so the height doesn't depend on the text.
+spacing_lg = text_size(font_lg, "0")[1] + 1
 
-min_temp = None
-max_temp = None
+# Icons, decoded once and keyed by file name without the extension. Converted
+# to RGBA so each icon can be used as its own paste mask.
+path = os.path.dirname(os.path.realpath(__file__))
+icons = {}
+for icon_file in os.listdir(f"{path}/icons"):
+    icon_name, extension = os.path.splitext(icon_file)
+    if extension == ".png":
+        with Image.open(f"{path}/icons/{icon_file}") as icon:
+            icons[icon_name] = icon.convert("RGBA")
+
+
+# Display range, kept in °F as that is all it is shown in
+min_temp_f = None
+max_temp_f = None
 
 factor = 2.25
-cpu_temps = [get_cpu_temperature()] * 5
+cpu_temps = deque([get_cpu_temperature()] * 5, maxlen=5)
 
 # Pressure variables
-pressure_vals = []
-time_vals = []
 num_vals = 1000
+# Once full, the window holds the latest num_vals + 1 samples
+pressure_vals = deque(maxlen=num_vals + 1)
+time_vals = deque(maxlen=num_vals + 1)
+# Running sums of x, y, x*x, x*y and y*y over the window, with x and y taken
+# relative to pressure_origin (time, pressure)
+pressure_sums = [0.0] * 5
+pressure_origin = [0.0, 0.0]
+pressure_samples_since_rebase = 0
 interval = 1
 trend = "-"
 
 
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser()
-    parser.add_argument(
-        "-b",
-        "--bind",
-        metavar="ADDRESS",
-        default="0.0.0.0",
-        help="Specify alternate bind address [default: 0.0.0.0]",
-    )
-    parser.add_argument(
-        "-p",
-        "--port",
-        metavar="PORT",
-        default=8000,
-        type=int,
-        help="Specify alternate port [default: 8000]",
-    )
-    parser.add_argument(
-        "-e",
-        "--enviro",
-        metavar="ENVIRO",
-        type=str_to_bool,
-        default="false",
-        help="Device is an Enviro (not Enviro+) so don't fetch data from particulate sensor as it doesn't exist [default: false]",
-    )
-    parser.add_argument(
-        "-t",
-        "--temp",
-        metavar="TEMPERATURE",
-        type=float,
-        help="The temperature compensation value to get better temperature results when the Enviro+ pHAT is too close to the Raspberry Pi board",
-    )
-    parser.add_argument(
-        "-u",
-        "--humid",
-        metavar="HUMIDITY",
-        type=float,
-        help="The humidity compensation value to get better humidity results when the Enviro+ pHAT is too close to the Raspberry Pi board",
-    )
-    parser.add_argument(
-        "-d",
-        "--debug",
-        metavar="DEBUG",
-        type=str_to_bool,
-        help="Turns on more vebose logging, showing sensor output and post responses [default: false]",
-    )
-    parser.add_argument(
-        "-i",
-        "--influxdb",
-        metavar="INFLUXDB",
-        type=str_to_bool,
-        default="false",
-        help="Post sensor data to InfluxDB Cloud [default: false]",
-    )
-    parser.add_argument(
-        "-l",
-        "--luftdaten",
-        metavar="LUFTDATEN",
-        type=str_to_bool,
-        default="false",
-        help="Post sensor data to Luftdaten.info [default: false]",
-    )
-    parser.add_argument(
-        "-s",
-        "--safecast",
-        metavar="SAFECAST",
-        type=str_to_bool,
-        default="false",
-        help="Post sensor data to Safecast.org [default: false]",
-    )
+# Command line arguments
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "-b",
+    "--bind",
+    metavar="ADDRESS",
+    default="0.0.0.0",
+    help="Specify alternate bind address [default: 0.0.0.0]",
+)
+parser.add_argument(
+    "-p",
+    "--port",
+    metavar="PORT",
+    default=8000,
+    type=int,
+    help="Specify alternate port [default: 8000]",
+)
+parser.add_argument(
+    "-e",
+    "--enviro",
+    metavar="ENVIRO",
+    type=str_to_bool,
+    default="false",
+    help="Device is an Enviro (not Enviro+) so don't fetch data from particulate sensor as it doesn't exist [default: false]",
+)
+parser.add_argument(
+    "-t",
+    "--temp",
+    metavar="TEMPERATURE",
+    type=float,
+    help="The temperature compensation value to get better temperature results when the Enviro+ pHAT is too close to the Raspberry Pi board",
+)
+parser.add_argument(
+    "-u",
+    "--humid",
+    metavar="HUMIDITY",
+    type=float,
+    help="The humidity compensation value to get better humidity results when the Enviro+ pHAT is too close to the Raspberry Pi board",
+)
+parser.add_argument(
+    "-d",
+    "--debug",
+    metavar="DEBUG",
+    type=str_to_bool,
+    help="Turns on more vebose logging, showing sensor output and post responses [default: false]",
+)
+for short_flag, long_flag, description in (
+    ("-i", "--influxdb", "Post sensor data to InfluxDB Cloud"),
+    ("-l", "--luftdaten", "Post sensor data to Luftdaten.info"),
+    ("-s", "--safecast", "Post sensor data to Safecast.org"),
+    ("-n", "--notecard", "Post sensor data to Notehub.io via Notecard LTE"),
+):
     parser.add_argument(
-        "-n",
-        "--notecard",
-        metavar="NOTECARD",
+        short_flag,
+        long_flag,
+        metavar=long_flag[2:].upper(),
         type=str_to_bool,
         default="false",
-        help="Post sensor data to Notehub.io via Notecard LTE [default: false]",
+        help=f"{description} [default: false]",
     )
+
+
+if __name__ == "__main__":
     args = parser.parse_args()
 
     # Start up the server to expose the metrics.
     start_http_server(addr=args.bind, port=args.port)
     # Generate some requests.
 
-    if args.debug:
-        DEBUG = True
+    if args.debug is not None:
+        DEBUG = args.debug
+    else:
+        try:
+            DEBUG = str_to_bool(DEBUG)
+        except ValueError as exception:
+            logging.warning("Ignoring the DEBUG setting: %s", exception)
+            DEBUG = False
+    if DEBUG:
+        # Sensor output and post responses are logged at debug level
+        logging.getLogger().setLevel(logging.DEBUG)
 
     if args.temp:
         logging.info(
-            f"Using temperature compensation, reducing the output value by {args.temp}° to account for heat leakage from Raspberry Pi board"
+            "Using temperature compensation, reducing the output value by %s° to account for heat leakage from Raspberry Pi board",
+            args.temp,
         )
 
     if args.humid:
         logging.info(
-            f"Using humidity compensation, increasing the output value by {args.humid}% to account for heat leakage from Raspberry Pi board"
+            "Using humidity compensation, increasing the output value by %s%% to account for heat leakage from Raspberry Pi board",
+            args.humid,
         )
 
     if args.influxdb:
-        # Post to InfluxDB in another thread
+        # Post to InfluxDB on the poster pool
         logging.info(
-            "Sensor data will be posted to InfluxDB every {} seconds".format(
-                INFLUXDB_TIME_BETWEEN_POSTS
-            )
+            "Sensor data will be posted to InfluxDB every %s seconds",
+            INFLUXDB_TIME_BETWEEN_POSTS,
         )
-        influx_thread = Thread(target=post_to_influxdb)
-        influx_thread.start()
+        schedule_posts(post_to_influxdb, INFLUXDB_TIME_BETWEEN_POSTS)
 
     if args.luftdaten:
-        # Post to Luftdaten in another thread
+        # Post to Luftdaten on the poster pool
         LUFTDATEN_SENSOR_UID = "raspi-" + get_serial_number()
         logging.info(
-            "Sensor data will be posted to Luftdaten every {} seconds for the UID {}".format(
-                LUFTDATEN_TIME_BETWEEN_POSTS, LUFTDATEN_SENSOR_UID
-            )
+            "Sensor data will be posted to Luftdaten every %s seconds for the UID %s",
+            LUFTDATEN_TIME_BETWEEN_POSTS,
+            LUFTDATEN_SENSOR_UID,
         )
-        luftdaten_thread = Thread(target=post_to_luftdaten)
-        luftdaten_thread.start()
+        schedule_posts(post_to_luftdaten, LUFTDATEN_TIME_BETWEEN_POSTS)
 
     if args.safecast:
-        # Post to Safecast in another thread
+        # Post to Safecast on the poster pool
         safecast_api_url = SafecastPy.PRODUCTION_API_URL
         if SAFECAST_DEV_MODE:
             safecast_api_url = SafecastPy.DEVELOPMENT_API_URL
         logging.info(
-            "Sensor data will be posted to {} every {} seconds".format(
-                safecast_api_url, SAFECAST_TIME_BETWEEN_POSTS
-            )
+            "Sensor data will be posted to %s every %s seconds",
+            safecast_api_url,
+            SAFECAST_TIME_BETWEEN_POSTS,
         )
-        influx_thread = Thread(target=post_to_safecast)
-        influx_thread.start()
+        schedule_posts(post_to_safecast, SAFECAST_TIME_BETWEEN_POSTS)
 
     if args.notecard:
-        # Post to Notehub via Notecard in another thread
+        # Post to Notehub via Notecard on the poster pool
         logging.info(
-            "Sensor data will be posted to Notehub via Notecard every {} seconds".format(
-                NOTECARD_TIME_BETWEEN_POSTS
-            )
+            "Sensor data will be posted to Notehub via Notecard every %s seconds",
+            NOTECARD_TIME_BETWEEN_POSTS,
         )
-        notecard_thread = Thread(target=post_to_notehub)
-        notecard_thread.start()
+        schedule_posts(post_to_notehub, NOTECARD_TIME_BETWEEN_POSTS)
+
+    if not poster_scheduler.empty():
+        poster_thread = Thread(target=poster_scheduler.run, name="poster-scheduler")
+        poster_thread.start()
+
+    if not args.enviro:
+        # The PMS5003 blocks for up to a second per frame, so read it in the
+        # background and let the main loop take the latest frame
+        particulates_thread = Thread(target=read_particulates, daemon=True)
+        particulates_thread.start()
 
-    logging.info("Listening on http://{}:{}".format(args.bind, args.port))
+    external_aqi_thread = Thread(target=refresh_external_aqi, daemon=True)
+    external_aqi_thread.start()
 
-    start_time = time.time()
+    logging.info("Listening on http://%s:%s", args.bind, args.port)
 
+    start_time = time.monotonic()
+    last_state = None
+    sensor_data = {}
+
+    # Sensors and the display run on their own monotonic deadlines, so the
+    # cadence doesn't drift by however long each tick takes
+    next_reading = next_display = time.monotonic()
     while True:
-        get_temperature(args.temp)
-        get_humidity(args.humid)
-        get_pressure()
-        get_light()
-        get_gas()
-        if not args.enviro:
-            get_particulates()
-        get_cpu_temperature()
-        if battery_sensor:
-            get_battery()
-        logging.info("Sensor data: {}".format(collect_all_data()))
-
-        internal_aqi: int = int(
-            aqi.to_aqi(
-                [
-                    (aqi.POLLUTANT_PM25, PM25.collect()[0].samples[0].value),
-                    (aqi.POLLUTANT_PM10, PM10.collect()[0].samples[0].value),
-                ]
-            )
-        )
-        external_aqi = get_external_AQI(LATITUDE, LONGITUDE, WAQI_API_KEY)
+        now = time.monotonic()
+        if now >= next_reading:
+            get_i2c_sensors(args.temp, args.humid)
+            if not args.enviro:
+                get_particulates()
+            get_cpu_temperature()
+            sensor_data = publish_sensor_data()
+            logging.debug("Sensor data: %s", sensor_data)
+            next_reading = next_deadline(next_reading, SENSOR_TIME_BETWEEN_READINGS)
+
+        if now < next_display:
+            time.sleep(max(0, min(next_reading, next_display) - time.monotonic()))
+            continue
+        next_display = next_deadline(next_display, DISPLAY_TIME_BETWEEN_REFRESHES)
+
+        # Readings used by the display, 0 until a sensor has been read
+        temperature = sensor_data.get("temperature", 0.0)
+        humidity = sensor_data.get("humidity", 0.0)
+        pressure = sensor_data.get("pressure", 0.0)
+        pm25 = sensor_data.get("pm25", 0.0)
+        pm10 = sensor_data.get("pm10", 0.0)
+
+        internal_aqi: int = pm_to_aqi(pm25, pm10)
 
-        path = os.path.dirname(os.path.realpath(__file__))
         progress, period, day, local_dt = sun_moon_time(city_name, time_zone)
-        background = draw_background(progress, period, day, external_aqi)
+        bg_key = background_key(progress, period, day, external_aqi)
 
         # Time.
-        time_elapsed = time.time() - start_time
-        date_string = local_dt.strftime("%Y-%b-%d").lstrip("0")
+        time_elapsed = time.monotonic() - start_time
+        date_string = date_label(local_dt.date())
         time_string = local_dt.strftime("%I:%M %p")
-        img = overlay_text(background, (0 + margin, 0 + margin), time_string, font_lg)
-        img = overlay_text(
-            img, (WIDTH - margin, 0 + margin), date_string, font_lg, align_right=True
-        )
 
         # Temperature
 
         # Corrected temperature
-        cpu_temp = get_cpu_temperature()
-        cpu_temps = cpu_temps[1:] + [cpu_temp]
-        avg_cpu_temp = sum(cpu_temps) / float(len(cpu_temps))
-        corr_temperature = TEMPERATURE.collect()[0].samples[0].value - (
-            (avg_cpu_temp - TEMPERATURE.collect()[0].samples[0].value) / factor
-        )
+        # Reuse the reading taken with the other sensors
+        cpu_temps.append(sensor_data["cpu_temperature"])
+        avg_cpu_temp = sum(cpu_temps) / len(cpu_temps)
+        corr_temperature = temperature - ((avg_cpu_temp - temperature) / factor)
 
+        temp_f = corr_temperature * 1.8 + 32.0
         if time_elapsed > 30:
-            if min_temp is None or max_temp is None:
-                min_temp = corr_temperature
-                max_temp = corr_temperature
-
-            elif corr_temperature < min_temp:
-                min_temp = corr_temperature
-            elif corr_temperature > max_temp:
-                max_temp = corr_temperature
-        temp_string = f"{(corr_temperature*1.8)+32:.0f}°F"
-        img = overlay_text(img, (68, 18), temp_string, font_lg, align_right=True)
-        spacing = font_lg.getsize(temp_string)[1] + 1
-        if min_temp is not None and max_temp is not None:
-            range_string = f"{(min_temp*1.8)+32:.0f}-{(max_temp*1.8)+32:.0f}"
+            if min_temp_f is None:
+                min_temp_f = max_temp_f = temp_f
+            elif temp_f < min_temp_f:
+                min_temp_f = temp_f
+            elif temp_f > max_temp_f:
+                max_temp_f = temp_f
+        temp_string = f"{temp_f:.0f}°F"
+        if min_temp_f is not None:
+            range_string = f"{min_temp_f:.0f}-{max_temp_f:.0f}"
         else:
             range_string = "------"
+
+        # Humidity
+        corr_humidity = correct_humidity(
+            humidity,
+            temperature,
+            corr_temperature,
+        )
+        humidity_string = f"{corr_humidity:.0f}%"
+        humidity_desc = describe_humidity(corr_humidity).upper()
+
+        # AQI
+        internal_aqi_str = f"{internal_aqi}/{external_aqi} AQI"
+        aqi_desc = describe_aqi(external_aqi).upper()
+
+        # Pressure
+
+        t = time.time()
+        mean_pressure, change_per_hour, trend = analyse_pressure(pressure, t)
+        pressure_string = f"{int(mean_pressure):,} {trend}"
+        pressure_desc = describe_pressure(mean_pressure).upper()
+
+        # Everything drawn follows from these, so when none of them have
+        # changed the frame on screen is already correct and isn't redrawn
+        state = (
+            bg_key,
+            time_string,
+            date_string,
+            temp_string,
+            range_string,
+            humidity_string,
+            humidity_desc,
+            internal_aqi_str,
+            aqi_desc,
+            pressure_string,
+            pressure_desc,
+        )
+        if state == last_state:
+            time.sleep(max(0, min(next_reading, next_display) - time.monotonic()))
+            continue
+        last_state = state
+
+        img = draw_background(bg_key)
+        img = overlay_text(img, (0 + margin, 0 + margin), time_string, font_lg)
+        img = overlay_text(
+            img, (right_margin, 0 + margin), date_string, font_lg, align_right=True
+        )
+
+        img = overlay_text(img, (68, 18), temp_string, font_lg, align_right=True)
         img = overlay_text(
             img,
-            (68, 18 + spacing),
+            (68, 18 + spacing_lg),
             range_string,
             font_sm,
             align_right=True,
             rectangle=True,
         )
-        temp_icon = Image.open(f"{path}/icons/temperature.png")
+        temp_icon = icons["temperature"]
         img.paste(temp_icon, (margin, 18), mask=temp_icon)
 
-        # Humidity
-        corr_humidity = correct_humidity(
-            HUMIDITY.collect()[0].samples[0].value,
-            TEMPERATURE.collect()[0].samples[0].value,
-            corr_temperature,
-        )
-        humidity_string = f"{corr_humidity:.0f}%"
         img = overlay_text(img, (68, 48), humidity_string, font_lg, align_right=True)
-        spacing = font_lg.getsize(humidity_string)[1] + 1
-        humidity_desc = describe_humidity(corr_humidity).upper()
         img = overlay_text(
             img,
-            (68, 48 + spacing),
+            (68, 48 + spacing_lg),
             humidity_desc,
             font_sm,
             align_right=True,
             rectangle=True,
         )
-        humidity_icon = Image.open(f"{path}/icons/humidity-{humidity_desc.lower()}.png")
+        humidity_icon = icons[f"humidity-{humidity_desc.lower()}"]
         img.paste(humidity_icon, (margin, 48), mask=humidity_icon)
 
-        internal_aqi_str = f"{internal_aqi}/{external_aqi} AQI"
         img = overlay_text(
-            img, (WIDTH - margin, 18), internal_aqi_str, font_lg, align_right=True
+            img, (right_margin, 18), internal_aqi_str, font_lg, align_right=True
         )
-        spacing = font_lg.getsize(internal_aqi_str.replace(",", ""))[1] + 1
-
-        aqi_desc = describe_aqi(external_aqi).upper()
         img = overlay_text(
             img,
-            (WIDTH - margin - 1, 18 + spacing),
+            (right_margin - 1, 18 + spacing_lg),
             aqi_desc,
             font_sm,
             align_right=True,
             rectangle=True,
         )
         if external_aqi > 101:
-            external_aqi_icon = Image.open(f"{path}/icons/aqi-bad.png")
+            external_aqi_icon = icons["aqi-bad"]
         else:
-            external_aqi_icon = Image.open(f"{path}/icons/aqi.png")
-        img.paste(external_aqi_icon, (80, 18), mask=external_aqi_icon.split()[-1])
+            external_aqi_icon = icons["aqi"]
+        img.paste(external_aqi_icon, (80, 18), mask=external_aqi_icon)
 
         # External AQI
         # external_aqi_str = f"ExtAQI: {int(external_aqi):,}"
         # img = overlay_text(
-        #     img, (WIDTH - margin, 48), external_aqi_str, font_lg, align_right=True
+        #     img, (right_margin, 48), external_aqi_str, font_lg, align_right=True
         # )
         # spacing = font_lg.getsize(external_aqi_str.replace(",", ""))[1] + 1
 
         # external_aqi_desc = describe_aqi(external_aqi).upper()
         # img = overlay_text(
         #     img,
-        #     (WIDTH - margin - 1, 48 + spacing),
+        #     (right_margin - 1, 48 + spacing_lg),
         #     external_aqi_desc,
         #     font_sm,
         #     align_right=True,
@@ -1311,37 +1470,28 @@ if __name__ == "__main__":
         #     external_aqi_icon = Image.open(f"{path}/icons/aqi.png")
         # img.paste(external_aqi_icon, (80, 48), mask=external_aqi_icon)
 
-        # Pressure
-
-        t = time.time()
-        mean_pressure, change_per_hour, trend = analyse_pressure(
-            PRESSURE.collect()[0].samples[0].value, t
-        )
-        pressure_string = f"{int(mean_pressure):,} {trend}"
         img = overlay_text(
-            img, (WIDTH - margin, 48), pressure_string, font_lg, align_right=True
+            img, (right_margin, 48), pressure_string, font_lg, align_right=True
         )
-        pressure_desc = describe_pressure(mean_pressure).upper()
-        spacing = font_lg.getsize(pressure_string.replace(",", ""))[1] + 1
         img = overlay_text(
             img,
-            (WIDTH - margin - 1, 48 + spacing),
+            (right_margin - 1, 48 + spacing_lg),
             pressure_desc,
             font_sm,
             align_right=True,
             rectangle=True,
         )
-        pressure_icon = Image.open(f"{path}/icons/weather-{pressure_desc.lower()}.png")
+        pressure_icon = icons[f"weather-{pressure_desc.lower()}"]
         img.paste(pressure_icon, (80, 48), mask=pressure_icon)
 
         # Display image
         # Light
-        # print(f"Lux: {LUX.collect()[0].samples[0].value}")
-        # if LUX.collect()[0].samples[0].value < 10:
+        # print(f"Lux: {sensor_data['lux']}")
+        # if sensor_data["lux"] < 10:
         #     disp.set_backlight(0)
         #     image_blank = Image.new("RGBA", (WIDTH, HEIGHT), color=(0, 0, 0))
         #     disp.display(image_blank)
         # else:
         disp.set_backlight(1)
         disp.display(img)
-        time.sleep(5)
+        time.sleep(max(0, min(next_reading, next_display) - time.monotonic()))